@@ -0,0 +1,42 @@
+"""add_document_chunks
+
+Revision ID: 5b2f9c1d7e40
+Revises: acce640faa0b
+Create Date: 2026-10-19 09:12:44.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f9c1d7e40'
+down_revision: Union[str, None] = 'acce640faa0b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Chunk embeddings are stored as raw float32 bytes
+    op.create_table(
+        'document_chunks',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, nullable=False),
+        sa.Column('document_id', UUID(as_uuid=True), sa.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.UniqueConstraint('document_id', 'model', 'chunk_index', name='uq_document_chunks_document_model_index'),
+    )
+
+    # Create index on document_id column
+    op.create_index(op.f('ix_document_chunks_document_id'), 'document_chunks', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_chunks_document_id'), table_name='document_chunks')
+    op.drop_table('document_chunks')
@@ -0,0 +1,36 @@
+"""Embed stored documents that have extracted text but no chunk embeddings.
+
+Covers documents uploaded before similarity search existed and uploads whose
+embedding call failed. Run from the project root:
+
+    python -m app.backfill_embeddings [--batch-size 50] [--limit N]
+"""
+import argparse
+import asyncio
+import logging
+
+from app.database import SessionLocal
+from app.services.embedding_service import EmbeddingService
+
+
+async def run(batch_size: int, limit: int = None) -> int:
+    db = SessionLocal()
+    try:
+        return await EmbeddingService.backfill(db, batch_size=batch_size, limit=limit)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=50, help="documents embedded per page")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many documents")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    embedded = asyncio.run(run(args.batch_size, args.limit))
+    print(f"Embedded {embedded} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,12 +20,34 @@ class Settings(BaseSettings):
     openrouter_model: str = "openai/gpt-4o-mini"
     max_file_size_mb: int = 5
 
+    batch_analysis_enabled: bool = True
+    batch_window_ms: int = 200
+    batch_max_documents: int = 8
+    batch_max_document_chars: int = 1500
+    batch_max_chars: int = 12000
+
     minio_endpoint: str = "localhost:9000"
     minio_access_key: str = "minioadmin"
     minio_secret_key: str = "minioadmin"
     minio_bucket: str = "documents"
     minio_secure: bool = False
 
+    embeddings_provider: str = "remote"
+    embeddings_uri: str = "https://openrouter.ai/api/v1/embeddings"
+    embeddings_api_key: str = ""
+    embeddings_model: str = "openai/text-embedding-3-small"
+    embedding_dim: int = 384
+    embedding_batch_size: int = 64
+    embedding_chunk_size: int = 1000
+    embedding_max_chunks: int = 32
+    embedding_reconcile_seconds: int = 60
+
+    log_level: str = "INFO"
+    log_file: str = "app.log"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_sample_rates: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -1,19 +1,27 @@
+import asyncio
 import logging
-from fastapi import FastAPI
+import re
+from uuid import uuid4
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import engine, Base, settings
+from app.logging_config import request_id_var, setup_logging, stop_logging
 from app.routers import documents
+from app.services.embedding_service import EmbeddingService
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
+log_listener = setup_logging(
+    level=settings.log_level,
+    log_file=settings.log_file,
+    max_bytes=settings.log_max_bytes,
+    backup_count=settings.log_backup_count,
+    sample_rates=settings.log_sample_rates
 )
 
 logger = logging.getLogger(__name__)
+background_tasks = set()
+
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
 
 Base.metadata.create_all(bind=engine)
 
@@ -34,6 +42,20 @@ app.add_middleware(
 app.include_router(documents.router)
 
 
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID", "")
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 @app.get("/")
 async def root():
     return {
@@ -41,7 +63,9 @@ async def root():
         "endpoints": {
             "upload": "POST /documents/upload",
             "analyze": "POST /documents/{id}/analyze",
-            "get": "GET /documents/{id}"
+            "get": "GET /documents/{id}",
+            "similar": "GET /documents/{id}/similar",
+            "semantic_search": "POST /documents/semantic-search"
         }
     }
 
@@ -53,9 +77,18 @@ async def health():
 
 @app.on_event("startup")
 async def startup_event():
+    try:
+        await run_in_threadpool(EmbeddingService.refresh_index)
+    except Exception as e:
+        logger.error(f"Failed to load similarity index: {str(e)}", exc_info=True)
+    task = asyncio.create_task(EmbeddingService.run_reconciler())
+    background_tasks.add(task)
     logger.info("Document Analysis API started")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("Document Analysis API shutting down")
\ No newline at end of file
+    logger.info("Document Analysis API shutting down")
+    for task in background_tasks:
+        task.cancel()
+    stop_logging(log_listener)
\ No newline at end of file
@@ -1,14 +1,24 @@
 import logging
 from datetime import datetime
+from typing import List, Tuple
 from uuid import UUID
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.database import get_db, settings
 from app.models import Document
-from app.schemas import DocumentUploadResponse, DocumentAnalysisResponse, DocumentResponse
+from app.schemas import (
+    DocumentUploadResponse,
+    DocumentAnalysisResponse,
+    DocumentResponse,
+    SemanticSearchRequest,
+    SimilarDocument,
+    SimilarDocumentsResponse,
+)
+from app.services.batch_analyzer import BatchAnalyzer
 from app.services.document_service import DocumentService
-from app.services.llm_service import LLMService
+from app.services.embedding_service import EmbeddingService
 from app.services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
@@ -17,6 +27,7 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -69,6 +80,12 @@ async def upload_document(
         StorageService.delete_file(object_name)
         raise HTTPException(status_code=500, detail="Failed to save document information")
 
+    if extracted_text:
+        # Embedded after the response is sent. On failure the document stays
+        # unindexed until `python -m app.backfill_embeddings` runs or
+        # /documents/{id}/similar is requested for it.
+        background_tasks.add_task(EmbeddingService.index_document_by_id, document.id)
+
     return DocumentUploadResponse(
         id=document.id,
         filename=document.filename,
@@ -79,6 +96,22 @@ async def upload_document(
     )
 
 
+@router.post("/semantic-search", response_model=SimilarDocumentsResponse)
+async def semantic_search(
+    request: SemanticSearchRequest,
+    db: Session = Depends(get_db)
+):
+    """Find documents whose content is closest in meaning to a free-text query."""
+
+    try:
+        query_vector = await EmbeddingService.embed_texts([request.query])
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    matches = await run_in_threadpool(EmbeddingService.search, db, query_vector, request.limit)
+    return _build_similar_response(db, matches)
+
+
 @router.post("/{document_id}/analyze", response_model=DocumentAnalysisResponse)
 async def analyze_document(
     document_id: UUID,
@@ -94,7 +127,7 @@ async def analyze_document(
         raise HTTPException(status_code=400, detail="No extracted text available")
 
     try:
-        analysis = await LLMService.analyze_document(document.extracted_text)
+        analysis = await BatchAnalyzer.analyze(document.extracted_text)
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
@@ -123,6 +156,52 @@ async def analyze_document(
     )
 
 
+@router.get("/{document_id}/similar", response_model=SimilarDocumentsResponse)
+async def get_similar_documents(
+    document_id: UUID,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Find the documents most similar to an existing document."""
+
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    vectors = await run_in_threadpool(EmbeddingService.get_document_vectors, db, document_id)
+    if vectors is None:
+        if not document.extracted_text:
+            raise HTTPException(status_code=400, detail="No extracted text available")
+        try:
+            vectors = await EmbeddingService.index_document(db, document)
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    matches = await run_in_threadpool(EmbeddingService.search, db, vectors, limit, document_id)
+    return _build_similar_response(db, matches)
+
+
+def _build_similar_response(db: Session, matches: List[Tuple[UUID, float]]) -> SimilarDocumentsResponse:
+    """Load matched documents and return them in score order."""
+    if not matches:
+        return SimilarDocumentsResponse(results=[])
+
+    documents = db.query(Document).filter(Document.id.in_([doc_id for doc_id, _ in matches])).all()
+    by_id = {document.id: document for document in documents}
+
+    return SimilarDocumentsResponse(results=[
+        SimilarDocument(
+            id=doc_id,
+            filename=by_id[doc_id].filename,
+            document_type=by_id[doc_id].document_type,
+            summary=by_id[doc_id].summary,
+            score=score
+        )
+        for doc_id, score in matches
+        if doc_id in by_id
+    ])
+
+
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: UUID,
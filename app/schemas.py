@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 
 
@@ -41,3 +41,20 @@ class DocumentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SimilarDocument(BaseModel):
+    id: UUID
+    filename: str
+    document_type: Optional[str] = None
+    summary: Optional[str] = None
+    score: float
+
+
+class SimilarDocumentsResponse(BaseModel):
+    results: List[SimilarDocument]
+
+
+class SemanticSearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    limit: int = Field(10, ge=1, le=100)
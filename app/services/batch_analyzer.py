@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.database import settings
+from app.services.llm_service import LLMConnectionError, LLMService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchAnalyzer:
+    """Coalesces concurrent analyses of short documents into shared LLM calls.
+
+    Short documents wait up to ``batch_window_ms`` for others to arrive and are
+    then sent together in one prompt. Each caller still gets its own result,
+    and documents the batch response did not cover are analyzed on their own.
+    If the service cannot be reached, every caller in the batch gets that error.
+    """
+
+    _pending: List[Tuple[str, asyncio.Future]] = []
+    _pending_chars = 0
+    _timer: Optional[asyncio.TimerHandle] = None
+    _tasks: set = set()
+
+    @classmethod
+    async def analyze(cls, text: str) -> Dict[str, Any]:
+        """Analyze a document, batching it with others when it is short."""
+        if not settings.batch_analysis_enabled or len(text) > settings.batch_max_document_chars:
+            return await LLMService.analyze_document(text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        cls._pending.append((text, future))
+        cls._pending_chars += len(text)
+
+        if len(cls._pending) >= settings.batch_max_documents or cls._pending_chars >= settings.batch_max_chars:
+            cls._schedule_flush()
+        elif cls._timer is None:
+            cls._timer = loop.call_later(settings.batch_window_ms / 1000, cls._schedule_flush)
+
+        return await future
+
+    @classmethod
+    def _schedule_flush(cls):
+        """Hand the pending documents to a background flush task."""
+        if cls._timer is not None:
+            cls._timer.cancel()
+            cls._timer = None
+        batch, cls._pending, cls._pending_chars = cls._pending, [], 0
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(cls._flush(batch))
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _flush(cls, batch: List[Tuple[str, asyncio.Future]]):
+        """Analyze a batch and resolve every waiting caller."""
+        # Short positional ids keep the prompt small and are easy for the model to echo back
+        items = {str(i + 1): entry for i, entry in enumerate(batch)}
+
+        results = {}
+        if len(items) > 1:
+            try:
+                results = await LLMService.analyze_documents({key: text for key, (text, _) in items.items()})
+            except LLMConnectionError as e:
+                # Retrying each document separately would only multiply calls to a failing service
+                for _, future in items.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            except Exception as e:
+                logger.error(f"Unexpected error in batch analysis of {len(items)} documents: {str(e)}", exc_info=True)
+            else:
+                if results:
+                    logger.info("Batch analyzed %d of %d documents in one call", len(results), len(items))
+
+        missing = [key for key in items if key not in results]
+        if missing:
+            fallbacks = await asyncio.gather(
+                *(LLMService.analyze_document(items[key][0]) for key in missing),
+                return_exceptions=True
+            )
+            results.update(zip(missing, fallbacks))
+
+        for key, (_, future) in items.items():
+            if future.done():
+                continue
+            result = results.get(key, ValueError("Document analysis failed"))
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,383 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import httpx
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, settings
+from app.models import Document, DocumentChunk
+from app.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class EmbeddingService:
+    _index: Optional[VectorIndex] = None
+    _last_chunk_id = 0
+    _chunk_marks: Dict[UUID, Tuple[int, int]] = {}
+    _sync_lock = threading.Lock()
+
+    @staticmethod
+    def model_name() -> str:
+        """Name recorded alongside stored embeddings."""
+        if settings.embeddings_provider == "local":
+            return f"local-hash-{settings.embedding_dim}"
+        return settings.embeddings_model
+
+    @staticmethod
+    def chunk_text(text: str) -> List[str]:
+        """Split text into whitespace-aligned chunks of roughly equal size."""
+        size = settings.embedding_chunk_size
+        text = text.strip()
+        chunks = []
+        start = 0
+        while start < len(text) and len(chunks) < settings.embedding_max_chunks:
+            end = min(start + size, len(text))
+            if end < len(text):
+                boundary = text.rfind(" ", start + size // 2, end)
+                if boundary != -1:
+                    end = boundary
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = end
+        return chunks
+
+    @staticmethod
+    def _embed_local(texts: List[str]) -> np.ndarray:
+        """Embed texts on the CPU with signed feature hashing of word unigrams and bigrams."""
+        dim = settings.embedding_dim
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            digests = np.array(
+                [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little") for f in features],
+                dtype=np.uint64
+            )
+            indices = (digests % np.uint64(dim)).astype(np.int64)
+            signs = np.where((digests >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], indices, signs)
+        return VectorIndex.normalize(vectors)
+
+    @staticmethod
+    async def _embed_remote(texts: List[str]) -> np.ndarray:
+        """Embed texts through an OpenAI-compatible embeddings endpoint in batches."""
+        batches = []
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for start in range(0, len(texts), settings.embedding_batch_size):
+                batch = texts[start:start + settings.embedding_batch_size]
+                try:
+                    response = await client.post(
+                        settings.embeddings_uri,
+                        headers={
+                            "Authorization": f"Bearer {settings.embeddings_api_key or settings.openrouter_api_key}",
+                            "Content-Type": "application/json",
+                        },
+                        json={
+                            "model": settings.embeddings_model,
+                            "input": batch
+                        }
+                    )
+                    response.raise_for_status()
+                    data = sorted(response.json()["data"], key=lambda item: item["index"])
+                except httpx.HTTPError as e:
+                    logger.error(f"Embeddings API request failed: {str(e)}")
+                    raise ValueError("Failed to connect to embeddings service")
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f"Unexpected embeddings response format: {str(e)}")
+                    raise ValueError("Received invalid response from embeddings service")
+
+                if len(data) != len(batch):
+                    logger.error(f"Embeddings API returned {len(data)} vectors for {len(batch)} inputs")
+                    raise ValueError("Received invalid response from embeddings service")
+                batches.append(np.asarray([item["embedding"] for item in data], dtype=np.float32))
+
+        return VectorIndex.normalize(np.vstack(batches))
+
+    @staticmethod
+    async def embed_texts(texts: List[str]) -> np.ndarray:
+        """Return one L2-normalised float32 embedding per text."""
+        if settings.embeddings_provider == "local":
+            return EmbeddingService._embed_local(texts)
+        return await EmbeddingService._embed_remote(texts)
+
+    @classmethod
+    def _apply_rows(cls, rows: Iterable[Tuple[int, UUID, bytes]]) -> int:
+        """Add every chunk of each document in rows to the index, skipping versions already loaded.
+
+        Rows must be ordered by document and hold all of a document's chunks.
+        A version is the newest chunk id plus the chunk count.
+        """
+        loaded = 0
+        for document_id, group in groupby(rows, key=lambda row: row[1]):
+            group = list(group)
+            version = (max(row[0] for row in group), len(group))
+            with cls._sync_lock:
+                cls._last_chunk_id = max(cls._last_chunk_id, version[0])
+                current = cls._chunk_marks.get(document_id)
+                if current is not None and (version == current or version[0] < current[0]):
+                    continue
+                cls._index.add(document_id, np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in group]))
+                cls._chunk_marks[document_id] = version
+            loaded += 1
+        return loaded
+
+    @classmethod
+    def _chunk_rows(cls, db: Session):
+        return (
+            db.query(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.embedding)
+            .filter(DocumentChunk.model == cls.model_name())
+            .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+        )
+
+    @classmethod
+    def _load_documents(cls, db: Session, document_ids: List[UUID]) -> int:
+        """Load all stored chunks of the given documents into the index."""
+        loaded = 0
+        for start in range(0, len(document_ids), 1000):
+            batch = document_ids[start:start + 1000]
+            loaded += cls._apply_rows(cls._chunk_rows(db).filter(DocumentChunk.document_id.in_(batch)).all())
+        return loaded
+
+    @classmethod
+    def get_index(cls, db: Session) -> VectorIndex:
+        """Return the shared index, reloading documents with chunks stored since the last call.
+
+        Whole documents are reloaded because a document's chunk ids can
+        interleave with another's. Documents committed out of id order can be
+        missed here; reconcile_index picks those up on its next run.
+        """
+        if cls._index is None:
+            cls._index = VectorIndex()
+
+        document_ids = [
+            document_id for (document_id,) in
+            db.query(DocumentChunk.document_id)
+            .filter(DocumentChunk.id > cls._last_chunk_id, DocumentChunk.model == cls.model_name())
+            .distinct()
+            .all()
+        ]
+        loaded = cls._load_documents(db, document_ids)
+        if loaded:
+            logger.info("Loaded embeddings for %d documents into index", loaded)
+        return cls._index
+
+    @classmethod
+    def get_document_vectors(cls, db: Session, document_id: UUID) -> Optional[np.ndarray]:
+        """Return the stored chunk vectors of a document, or None if it has not been embedded.
+
+        Falls back to the table for chunks the incremental sync has not picked
+        up yet. Blocking; run it off the event loop.
+        """
+        index = cls.get_index(db)
+        vectors = index.get_vectors(document_id)
+        if vectors is None:
+            cls._load_documents(db, [document_id])
+            vectors = index.get_vectors(document_id)
+        return vectors
+
+    @classmethod
+    def search(
+        cls,
+        db: Session,
+        query: np.ndarray,
+        limit: int,
+        exclude: Optional[UUID] = None,
+    ) -> List[Tuple[UUID, float]]:
+        """Sync the index and rank documents against query. Blocking; run it off the event loop."""
+        return cls.get_index(db).search(query, limit, exclude=exclude)
+
+    @classmethod
+    def reconcile_index(cls, db: Session):
+        """Compare the index against the table and reload documents that are missing or out of date."""
+        if cls._index is None:
+            cls._index = VectorIndex()
+
+        latest = {
+            doc_id: (chunk_id, count) for doc_id, chunk_id, count in
+            db.query(DocumentChunk.document_id, func.max(DocumentChunk.id), func.count(DocumentChunk.id))
+            .filter(DocumentChunk.model == cls.model_name())
+            .group_by(DocumentChunk.document_id)
+            .all()
+        }
+        snapshot = max((version[0] for version in latest.values()), default=0)
+
+        with cls._sync_lock:
+            stale = [
+                doc_id for doc_id, version in latest.items()
+                if doc_id not in cls._chunk_marks
+                or (version != cls._chunk_marks[doc_id] and version[0] >= cls._chunk_marks[doc_id][0])
+            ]
+            removed = [
+                doc_id for doc_id, version in cls._chunk_marks.items()
+                if doc_id not in latest and version[0] <= snapshot
+            ]
+            for doc_id in removed:
+                cls._index.remove(doc_id)
+                del cls._chunk_marks[doc_id]
+
+        loaded = cls._load_documents(db, stale)
+
+        if loaded or removed:
+            logger.info("Reconciled index: loaded %d documents, removed %d", loaded, len(removed))
+
+    @classmethod
+    def load_index(cls, db: Session):
+        """Build the shared index from every stored chunk of the current model."""
+        cls._index = VectorIndex()
+        cls._last_chunk_id = 0
+        cls._chunk_marks = {}
+        loaded = cls._apply_rows(cls._chunk_rows(db).yield_per(1000))
+        logger.info("Loaded embeddings for %d documents into index", loaded)
+
+    @classmethod
+    def refresh_index(cls):
+        """Load or reconcile the shared index using a dedicated session."""
+        db = SessionLocal()
+        try:
+            if cls._index is None:
+                cls.load_index(db)
+            else:
+                cls.reconcile_index(db)
+        finally:
+            db.close()
+
+    @classmethod
+    async def run_reconciler(cls):
+        """Periodically reconcile the index off the event loop."""
+        while True:
+            await asyncio.sleep(settings.embedding_reconcile_seconds)
+            try:
+                await run_in_threadpool(cls.refresh_index)
+            except Exception as e:
+                logger.error(f"Failed to reconcile similarity index: {str(e)}", exc_info=True)
+
+    @staticmethod
+    def _save_chunks(db: Session, document: Document, chunks: List[str], vectors: np.ndarray) -> bool:
+        """Replace the stored chunks of a document.
+
+        Returns False when a concurrent writer stored chunks for the same
+        document and model first.
+        """
+        try:
+            db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).delete()
+            db.add_all([
+                DocumentChunk(
+                    document_id=document.id,
+                    chunk_index=i,
+                    content=chunk,
+                    embedding=vector.tobytes(),
+                    model=EmbeddingService.model_name()
+                )
+                for i, (chunk, vector) in enumerate(zip(chunks, vectors))
+            ])
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            logger.info("Embeddings for document %s were stored by a concurrent request", document.id)
+            return False
+        except Exception as e:
+            logger.error(f"Database error saving embeddings for document {document.id}: {str(e)}")
+            db.rollback()
+            raise ValueError("Failed to save document embeddings")
+
+    @classmethod
+    async def index_document(cls, db: Session, document: Document) -> np.ndarray:
+        """Embed a document's text, persist its chunks and add it to the index."""
+        chunks = cls.chunk_text(document.extracted_text or "")
+        if not chunks:
+            raise ValueError("No extracted text available")
+
+        vectors = await cls.embed_texts(chunks)
+        if not cls._save_chunks(db, document, chunks, vectors):
+            stored = await run_in_threadpool(cls.get_document_vectors, db, document.id)
+            if stored is None:
+                raise ValueError("Failed to save document embeddings")
+            return stored
+
+        # Pull the new rows through the regular sync path so documents stored
+        # by other workers are picked up at the same time.
+        await run_in_threadpool(cls.get_index, db)
+        return vectors
+
+    @classmethod
+    async def index_document_by_id(cls, document_id: UUID):
+        """Index a document with its own session, for use after the response is sent."""
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document and document.extracted_text:
+                await cls.index_document(db, document)
+        except Exception as e:
+            logger.warning(f"Failed to index document {document_id} for similarity search: {str(e)}")
+        finally:
+            db.close()
+
+    @classmethod
+    async def backfill(cls, db: Session, batch_size: int = 50, limit: Optional[int] = None) -> int:
+        """Embed stored documents that have text but no chunks for the current model.
+
+        Documents are embedded a page at a time so their chunks share embedding
+        requests. Returns the number of documents embedded.
+        """
+        has_chunks = (
+            db.query(DocumentChunk.id)
+            .filter(DocumentChunk.document_id == Document.id, DocumentChunk.model == cls.model_name())
+            .exists()
+        )
+        embedded = 0
+        last_id = None
+
+        while limit is None or embedded < limit:
+            query = db.query(Document).filter(
+                Document.extracted_text.isnot(None),
+                Document.extracted_text != "",
+                ~has_chunks
+            )
+            if last_id is not None:
+                query = query.filter(Document.id > last_id)
+            page_size = batch_size if limit is None else min(batch_size, limit - embedded)
+            documents = query.order_by(Document.id).limit(page_size).all()
+            if not documents:
+                break
+            last_id = documents[-1].id
+
+            chunked = [(document, cls.chunk_text(document.extracted_text)) for document in documents]
+            chunked = [(document, chunks) for document, chunks in chunked if chunks]
+            texts = [chunk for _, chunks in chunked for chunk in chunks]
+            if not texts:
+                continue
+
+            try:
+                vectors = await cls.embed_texts(texts)
+            except ValueError as e:
+                logger.error(f"Failed to embed {len(chunked)} documents during backfill: {str(e)}")
+                continue
+
+            offset = 0
+            for document, chunks in chunked:
+                try:
+                    if cls._save_chunks(db, document, chunks, vectors[offset:offset + len(chunks)]):
+                        embedded += 1
+                except ValueError:
+                    pass
+                offset += len(chunks)
+            logger.info("Backfilled embeddings for %d documents", embedded)
+
+        return embedded
@@ -1,44 +1,29 @@
 import httpx
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.database import settings
 
 logger = logging.getLogger(__name__)
 
-
-class LLMService:
-    @staticmethod
-    async def analyze_document(text: str) -> Dict[str, Any]:
-        """Send document text to LLM for analysis."""
-
-        prompt = f"""You are a document analysis assistant. Analyze the following document and extract information.
-
-IMPORTANT: You MUST respond with ONLY a JSON object in EXACTLY this structure (no other text):
-
-{{
-  "summary": "A 2-3 sentence summary of the document",
-  "document_type": "one of: invoice, cv, resume, report, letter, contract, prd, readme, guide, or other",
-  "metadata": {{
-    "key1": "value1",
-    "key2": "value2"
-  }}
-}}
-
-Guidelines for metadata extraction by document type:
+METADATA_GUIDELINES = """Guidelines for metadata extraction by document type:
 - Invoice: date, invoice_number, total_amount, vendor, client
 - CV/Resume: name, email, phone, skills (as comma-separated string), experience_years
 - Report: title, date, author, department, summary
 - Letter: date, sender, recipient, subject
 - Contract: parties, date, contract_type, value
 - PRD: product_name, version, author, date
-- Guide/README: title, topic, version
+- Guide/README: title, topic, version"""
 
-Document text:
-{text[:4000]}
 
-Remember: Respond with ONLY the JSON object, no markdown, no explanations, no extra text."""
+class LLMConnectionError(ValueError):
+    """Raised when the analysis service could not be reached or returned an HTTP error."""
 
+
+class LLMService:
+    @staticmethod
+    async def _complete(prompt: str) -> str:
+        """Send a prompt to the LLM and return the raw message content."""
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
                 response = await client.post(
@@ -57,69 +42,182 @@ Remember: Respond with ONLY the JSON object, no markdown, no explanations, no ex
                 response.raise_for_status()
 
                 result = response.json()
-                logger.debug(f"LLM API response: {json.dumps(result, indent=2)}")
-                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM API response: %s", json.dumps(result, indent=2))
+
                 if "choices" not in result or len(result["choices"]) == 0:
                     logger.error(f"No choices in LLM response: {result}")
                     raise ValueError("Received invalid response from analysis service")
-                
+
                 message = result["choices"][0].get("message", {})
                 content = message.get("content", "")
-                
+
                 if not content:
                     logger.error(f"Empty content in LLM response: {result}")
                     raise ValueError("Received empty response from analysis service")
-                
-                logger.debug(f"Raw LLM content: {content}")
-
-                content = content.strip()
-                if content.startswith("```json"):
-                    content = content[7:]
-                if content.startswith("```"):
-                    content = content[3:]
-                if content.endswith("```"):
-                    content = content[:-3]
-                content = content.strip()
-                
-                json_start = content.find('{')
-                json_end = content.rfind('}')
-                if json_start != -1 and json_end != -1:
-                    content = content[json_start:json_end + 1]
-
-                logger.debug(f"Cleaned content: {content}")
-
-                try:
-                    analysis = json.loads(content)
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parse error: {str(e)}. Attempting fallback...")
-                    analysis = {}
-
-                if not isinstance(analysis, dict):
-                    logger.error(f"LLM returned non-dict: {type(analysis)}")
-                    analysis = {}
-
-                if not all(key in analysis for key in ["summary", "document_type", "metadata"]):
-                    logger.warning(f"LLM response missing required fields. Got keys: {analysis.keys()}")
-
-                    if "summary" not in analysis and "document_type" not in analysis:
-                        logger.error("Response appears to be raw metadata instead of full analysis structure")
-                        raise ValueError("LLM did not follow the required response format")
-
-                return {
-                    "summary": analysis.get("summary", "No summary available"),
-                    "document_type": analysis.get("document_type", "unknown"),
-                    "metadata": analysis.get("metadata", {})
-                }
+
+                logger.debug("Raw LLM content: %s", content)
+                return content
 
             except httpx.HTTPError as e:
                 logger.error(f"LLM API request failed: {str(e)}")
-                raise ValueError("Failed to connect to analysis service")
+                raise LLMConnectionError("Failed to connect to analysis service")
             except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse LLM response. Content was: '{content}'. Error: {str(e)}")
+                logger.error(f"Failed to parse LLM API response: {str(e)}")
                 raise ValueError("Failed to process analysis results")
             except KeyError as e:
                 logger.error(f"Unexpected LLM response format: {str(e)}, Response: {result}")
                 raise ValueError("Received invalid response from analysis service")
-            except Exception as e:
-                logger.error(f"Unexpected error in LLM analysis: {str(e)}", exc_info=True)
-                raise ValueError("Document analysis failed")
\ No newline at end of file
+
+    @staticmethod
+    def _extract_json(content: str, opening: str, closing: str) -> str:
+        """Strip markdown fences and surrounding text from a JSON payload."""
+        content = content.strip()
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        content = content.strip()
+
+        json_start = content.find(opening)
+        json_end = content.rfind(closing)
+        if json_start != -1 and json_end != -1:
+            content = content[json_start:json_end + 1]
+
+        logger.debug("Cleaned content: %s", content)
+        return content
+
+    @staticmethod
+    def _normalize_analysis(analysis: Any) -> Optional[Dict[str, Any]]:
+        """Fill in defaults for a parsed analysis, or return None if it is unusable."""
+        if not isinstance(analysis, dict):
+            logger.error(f"LLM returned non-dict: {type(analysis)}")
+            analysis = {}
+
+        if not all(key in analysis for key in ["summary", "document_type", "metadata"]):
+            logger.warning(f"LLM response missing required fields. Got keys: {analysis.keys()}")
+
+            if "summary" not in analysis and "document_type" not in analysis:
+                logger.error("Response appears to be raw metadata instead of full analysis structure")
+                return None
+
+        return {
+            "summary": analysis.get("summary", "No summary available"),
+            "document_type": analysis.get("document_type", "unknown"),
+            "metadata": analysis.get("metadata", {})
+        }
+
+    @staticmethod
+    async def analyze_document(text: str) -> Dict[str, Any]:
+        """Send document text to LLM for analysis."""
+
+        prompt = f"""You are a document analysis assistant. Analyze the following document and extract information.
+
+IMPORTANT: You MUST respond with ONLY a JSON object in EXACTLY this structure (no other text):
+
+{{
+  "summary": "A 2-3 sentence summary of the document",
+  "document_type": "one of: invoice, cv, resume, report, letter, contract, prd, readme, guide, or other",
+  "metadata": {{
+    "key1": "value1",
+    "key2": "value2"
+  }}
+}}
+
+{METADATA_GUIDELINES}
+
+Document text:
+{text[:4000]}
+
+Remember: Respond with ONLY the JSON object, no markdown, no explanations, no extra text."""
+
+        try:
+            content = await LLMService._complete(prompt)
+            content = LLMService._extract_json(content, "{", "}")
+
+            try:
+                analysis = json.loads(content)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parse error: {str(e)}. Attempting fallback...")
+                analysis = {}
+
+            result = LLMService._normalize_analysis(analysis)
+            if result is None:
+                raise ValueError("LLM did not follow the required response format")
+            return result
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in LLM analysis: {str(e)}", exc_info=True)
+            raise ValueError("Document analysis failed")
+
+    @staticmethod
+    async def analyze_documents(texts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Analyze several short documents in one LLM call.
+
+        Returns the analyses keyed like the input. Documents the LLM skipped or
+        answered in the wrong shape are left out so callers can retry them.
+        Raises LLMConnectionError if the service could not be reached.
+        """
+
+        documents = "\n\n".join(
+            f"### Document ID: {key}\n{text[:4000]}" for key, text in texts.items()
+        )
+
+        prompt = f"""You are a document analysis assistant. Analyze EACH of the following {len(texts)} documents independently and extract information.
+
+IMPORTANT: You MUST respond with ONLY a JSON array containing one object per document, in EXACTLY this structure (no other text):
+
+[
+  {{
+    "id": "the Document ID exactly as given",
+    "summary": "A 2-3 sentence summary of the document",
+    "document_type": "one of: invoice, cv, resume, report, letter, contract, prd, readme, guide, or other",
+    "metadata": {{
+      "key1": "value1",
+      "key2": "value2"
+    }}
+  }}
+]
+
+{METADATA_GUIDELINES}
+
+{documents}
+
+Remember: Respond with ONLY the JSON array with exactly {len(texts)} objects, no markdown, no explanations, no extra text."""
+
+        try:
+            content = await LLMService._complete(prompt)
+        except LLMConnectionError:
+            raise
+        except ValueError:
+            # Already logged by _complete; the response was unusable as a whole
+            return {}
+
+        try:
+            items = json.loads(LLMService._extract_json(content, "[", "]"))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse batch analysis of {len(texts)} documents: {str(e)}")
+            return {}
+
+        if isinstance(items, dict):
+            items = next((value for value in items.values() if isinstance(value, list)), [items])
+        if not isinstance(items, list):
+            logger.error(f"LLM returned non-list for batch analysis: {type(items)}")
+            return {}
+
+        results = {}
+        for item in items:
+            if not isinstance(item, dict) or str(item.get("id")) not in texts:
+                logger.warning(f"Skipping batch analysis item without a known id: {item}")
+                continue
+            analysis = LLMService._normalize_analysis(item)
+            if analysis is not None:
+                results[str(item["id"])] = analysis
+
+        if len(results) < len(texts):
+            logger.warning(f"Batch analysis returned {len(results)} of {len(texts)} documents")
+        return results
@@ -0,0 +1,173 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+
+class VectorIndex:
+    """In-memory cosine similarity index over chunk embeddings.
+
+    Vectors are stored L2-normalised in one contiguous float32 matrix so a
+    search is a single matrix-vector product. Documents can be added or
+    replaced at any time; replaced rows are tombstoned and compacted away
+    once they make up half of the matrix.
+    """
+
+    def __init__(self, dim: Optional[int] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self._capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._codes = np.empty(initial_capacity, dtype=np.int64)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._size = 0
+        self._dead = 0
+        self._ids: List[UUID] = []
+        self._code_by_id: Dict[UUID, int] = {}
+        self._rows_by_code: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows_by_code)
+
+    def __contains__(self, document_id: UUID) -> bool:
+        code = self._code_by_id.get(document_id)
+        return code is not None and code in self._rows_by_code
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """Return a float32 copy of vectors scaled to unit length."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, extra: int):
+        """Grow the backing arrays geometrically to fit extra rows."""
+        needed = self._size + extra
+        if self._vectors is not None and needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        codes = np.empty(capacity, dtype=np.int64)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            codes[:self._size] = self._codes[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._vectors, self._codes, self._alive = vectors, codes, alive
+        self._capacity = capacity
+
+    def _compact(self):
+        """Drop tombstoned rows and rebuild the row lookup."""
+        keep = np.flatnonzero(self._alive[:self._size])
+        size = len(keep)
+        self._vectors[:size] = self._vectors[keep]
+        self._codes[:size] = self._codes[keep]
+        self._alive[:size] = True
+        self._alive[size:self._size] = False
+        self._size = size
+        self._dead = 0
+
+        order = np.argsort(self._codes[:size], kind="stable")
+        codes = self._codes[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        self._rows_by_code = {
+            int(group[0]): rows
+            for group, rows in zip(np.split(codes, bounds), np.split(order, bounds))
+            if len(group)
+        }
+
+    def _remove_locked(self, document_id: UUID):
+        code = self._code_by_id.get(document_id)
+        rows = self._rows_by_code.pop(code, None) if code is not None else None
+        if rows is not None:
+            self._alive[rows] = False
+            self._dead += len(rows)
+
+    def add(self, document_id: UUID, vectors: np.ndarray):
+        """Add or replace the chunk vectors of a document."""
+        vectors = self.normalize(vectors)
+        if len(vectors) == 0:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+            self._remove_locked(document_id)
+            code = self._code_by_id.get(document_id)
+            if code is None:
+                code = len(self._ids)
+                self._ids.append(document_id)
+                self._code_by_id[document_id] = code
+
+            self._ensure_capacity(len(vectors))
+            start, end = self._size, self._size + len(vectors)
+            self._vectors[start:end] = vectors
+            self._codes[start:end] = code
+            self._alive[start:end] = True
+            self._rows_by_code[code] = np.arange(start, end)
+            self._size = end
+
+            if self._dead > self._size // 2:
+                self._compact()
+
+    def remove(self, document_id: UUID):
+        """Remove a document from the index if present."""
+        with self._lock:
+            self._remove_locked(document_id)
+
+    def get_vectors(self, document_id: UUID) -> Optional[np.ndarray]:
+        """Return the stored chunk vectors of a document."""
+        with self._lock:
+            code = self._code_by_id.get(document_id)
+            rows = self._rows_by_code.get(code) if code is not None else None
+            return None if rows is None else self._vectors[rows].copy()
+
+    def search(
+        self,
+        query: np.ndarray,
+        limit: int = 10,
+        exclude: Optional[UUID] = None,
+    ) -> List[Tuple[UUID, float]]:
+        """Return up to limit documents ranked by their best chunk score.
+
+        A multi-row query is scored by the mean of its normalised rows, which
+        is how whole documents are compared against each other.
+        """
+        query = self.normalize(query)
+        if len(query) > 1:
+            query = self.normalize(query.mean(axis=0))
+        query = query[0]
+
+        with self._lock:
+            if self._vectors is None or self._size == 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Expected query of dimension {self.dim}, got {query.shape[0]}")
+
+            scores = self._vectors[:self._size] @ query
+            scores[~self._alive[:self._size]] = -np.inf
+            exclude_code = self._code_by_id.get(exclude) if exclude is not None else None
+            if exclude_code is not None and exclude_code in self._rows_by_code:
+                scores[self._rows_by_code[exclude_code]] = -np.inf
+            codes = self._codes[:self._size]
+
+            # Chunks of one document compete for the same slot, so widen the
+            # candidate pool until enough distinct documents are found.
+            candidates = min(self._size, max(limit * 4, 32))
+            while True:
+                top = np.argpartition(-scores, candidates - 1)[:candidates]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                top = top[np.isfinite(scores[top])]
+                _, first = np.unique(codes[top], return_index=True)
+                if len(first) >= limit or candidates >= self._size or len(top) < candidates:
+                    break
+                candidates = min(self._size, candidates * 4)
+
+            best = top[np.sort(first)][:limit]
+            return [(self._ids[codes[row]], float(scores[row])) for row in best]
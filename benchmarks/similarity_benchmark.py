@@ -0,0 +1,65 @@
+"""Latency benchmark for the in-memory similarity index.
+
+Fills a VectorIndex with random unit vectors and times incremental inserts
+and top-k searches. Run from the project root:
+
+    python -m benchmarks.similarity_benchmark --documents 100000
+"""
+import argparse
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--chunks", type=int, default=2, help="chunks per document")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = VectorIndex(dim=args.dim)
+    ids = [uuid4() for _ in range(args.documents)]
+
+    start = time.perf_counter()
+    for document_id in ids:
+        index.add(document_id, rng.standard_normal((args.chunks, args.dim), dtype=np.float32))
+    build_seconds = time.perf_counter() - start
+    print(f"indexed {args.documents} documents ({args.documents * args.chunks} chunks, dim {args.dim}) "
+          f"in {build_seconds:.2f}s ({build_seconds / args.documents * 1e6:.1f}us/doc)")
+
+    def timed(run):
+        samples = []
+        for _ in range(args.queries):
+            t = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - t)
+        return samples
+
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    query_iter = iter(queries)
+    search = timed(lambda: index.search(next(query_iter), args.limit))
+
+    doc_iter = iter(ids[:args.queries])
+    similar = timed(lambda: index.search(index.get_vectors(d := next(doc_iter)), args.limit, exclude=d))
+
+    replace_iter = iter(ids[:args.queries])
+    replace = timed(lambda: index.add(next(replace_iter), rng.standard_normal((args.chunks, args.dim), dtype=np.float32)))
+
+    for name, samples in (("semantic search", search), ("similar documents", similar), ("replace document", replace)):
+        print(f"{name:<18} p50 {percentile_ms(samples, 50):7.2f}ms  p95 {percentile_ms(samples, 95):7.2f}ms  "
+              f"p99 {percentile_ms(samples, 99):7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()